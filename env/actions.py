@@ -1,67 +1,128 @@
 from .card import Card
 from dataclasses import dataclass
 from abc import ABC
+from functools import lru_cache
+from typing import Callable, ClassVar, Dict, Tuple
 
 
 class NotationDoesNotExistException(Exception):
     pass
 
 
+# Integer tag of each action class, lets the board dispatch by indexing instead of hashing types
+KIND_PLAY, KIND_LOSE, KIND_REVEAL, KIND_BET, KIND_PASS = range(5)
+
+
 class Action(ABC):
-    pass
+    __slots__ = ()
+    kind: ClassVar[int]
 
     @classmethod
     def from_notation(cls, notation: str) -> 'Action':
-        if notation.startswith("P"):
-            return PassAction()
-        elif notation.startswith("B"):
-            return BetAction(int(notation[1:]))
-        elif notation.startswith("R"):
-            return RevealCardAction(notation[1:])
-        elif notation.startswith("L"):
-            return LoseCardAction(Card(notation[1:]))
-        elif notation == 'S':
-            return PlayCardAction(Card.SKULL)
-        elif notation == 'F':
-            return PlayCardAction(Card.FLOWER)
-        else:
+        # Dispatch on the first character instead of testing every prefix
+        parser = _PARSERS.get(notation[:1])
+        if parser is None:
             raise NotationDoesNotExistException()
+        return parser(notation)
 
+    def __reduce__(self):
+        # Frozen dataclasses with __slots__ cannot have their state set back by copy and pickle
+        return type(self), tuple(getattr(self, field) for field in self.__slots__)
 
-@dataclass
+
+@dataclass(frozen=True)
 class PlayCardAction(Action):
+    __slots__ = ('card',)
+    kind: ClassVar[int] = KIND_PLAY
     card: Card
 
     def __str__(self) -> str:
         return f"{self.card.value}"
 
 
-@dataclass
+@dataclass(frozen=True)
 class LoseCardAction(Action):
+    __slots__ = ('card',)
+    kind: ClassVar[int] = KIND_LOSE
     card: Card
 
     def __str__(self) -> str:
         return f"L{self.card.value}"
 
 
-@dataclass
+@dataclass(frozen=True)
 class RevealCardAction(Action):
+    __slots__ = ('player_name',)
+    kind: ClassVar[int] = KIND_REVEAL
     player_name: str
 
     def __str__(self) -> str:
         return f"R{self.player_name}"
 
 
-@dataclass
+@dataclass(frozen=True)
 class BetAction(Action):
+    __slots__ = ('amount',)
+    kind: ClassVar[int] = KIND_BET
     amount: int
 
     def __str__(self) -> str:
         return f"B{self.amount}"
 
 
-@dataclass
+@dataclass(frozen=True)
 class PassAction(Action):
+    __slots__ = ()
+    kind: ClassVar[int] = KIND_PASS
+
     def __str__(self) -> str:
         return "P"
 
+
+# Actions are immutable, so the common ones are shared instead of rebuilt
+PASS = PassAction()
+PLAY_SKULL = PlayCardAction(Card.SKULL)
+PLAY_FLOWER = PlayCardAction(Card.FLOWER)
+LOSE_SKULL = LoseCardAction(Card.SKULL)
+LOSE_FLOWER = LoseCardAction(Card.FLOWER)
+_LOSE_CARD_ACTIONS: Dict[Card, LoseCardAction] = {Card.SKULL: LOSE_SKULL, Card.FLOWER: LOSE_FLOWER}
+
+
+@lru_cache(maxsize=None)
+def bet_action(amount: int) -> BetAction:
+    return BetAction(amount)
+
+
+@lru_cache(maxsize=None)
+def bet_actions(lowest: int, highest: int) -> Tuple[BetAction, ...]:
+    # Every bet from lowest to highest included, built once per range
+    return tuple(bet_action(amount) for amount in range(lowest, highest + 1))
+
+
+@lru_cache(maxsize=None)
+def reveal_card_action(player_name: str) -> RevealCardAction:
+    return RevealCardAction(player_name)
+
+
+def _parse_lose_card(notation: str) -> LoseCardAction:
+    card = Card(notation[1:])
+    return _LOSE_CARD_ACTIONS.get(card) or LoseCardAction(card)
+
+
+def _parse_play_card(notation: str) -> PlayCardAction:
+    # Playing a card is written as the card alone
+    if notation == 'S':
+        return PLAY_SKULL
+    if notation == 'F':
+        return PLAY_FLOWER
+    raise NotationDoesNotExistException()
+
+
+_PARSERS: Dict[str, Callable[[str], Action]] = {
+    'P': lambda notation: PASS,
+    'B': lambda notation: bet_action(int(notation[1:])),
+    'R': lambda notation: reveal_card_action(notation[1:]),
+    'L': _parse_lose_card,
+    'S': _parse_play_card,
+    'F': _parse_play_card,
+}
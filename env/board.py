@@ -1,17 +1,40 @@
-from copy import deepcopy
+from collections import deque
 from dataclasses import dataclass
 from logging import getLogger
-from typing import List, Optional, Union
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 from IPython.display import display
 
-from .actions import Action, BetAction, LoseCardAction, PassAction, PlayCardAction, RevealCardAction
+from .actions import (
+    LOSE_FLOWER,
+    LOSE_SKULL,
+    PASS,
+    PLAY_FLOWER,
+    PLAY_SKULL,
+    Action,
+    BetAction,
+    LoseCardAction,
+    PassAction,
+    PlayCardAction,
+    RevealCardAction,
+    bet_actions,
+    reveal_card_action,
+)
 from .card import Card
 from .display import get_canvas
 from .player import Player, PlayerState
 
 logger = getLogger()
 
+# Observation layout: highest bet and cards shown, then one block per player starting with the observer.
+# A block holds hand size, skulls in hand, stack size, skulls in stack, revealed flowers, revealed skulls,
+# points, alive, playing, next player and bet holder. The skulls of the other players are hidden and left at 0.
+OBS_HEADER_SIZE = 2
+OBS_PLAYER_SIZE = 11
+# Number of skulls for every stack_skulls mask, a stack never holds more than 4 cards
+_SKULLS_IN_STACK = tuple(bin(mask).count('1') for mask in range(16))
+
 
 class MoveIsNotLegal(Exception):
     pass
@@ -25,8 +48,13 @@ class GameHasNotStarted(Exception):
     pass
 
 
+class HistoryIsNotRecorded(Exception):
+    pass
+
+
 @dataclass
 class BoardState:
+    __slots__ = ('players', 'bet_holder', 'highest_bet', 'next_player')
     players: List[PlayerState]
     bet_holder: Optional[str]
     highest_bet: int
@@ -36,30 +64,125 @@ class BoardState:
         display(get_canvas(self))
 
 
+# A position of the history with its players in seat order, its legal moves and the seat of its first player
+_HistoryEntry = Tuple[BoardState, List[Action], int]
+
+
 class Board:
-    def __init__(self, player_names: List[str]):
+    __slots__ = (
+        'players',
+        '_start_offset',
+        'bet_holder',
+        'highest_bet',
+        'next_player',
+        'next_player_idx',
+        'bet_holder_idx',
+        'action_record',
+        'state_record',
+        '_record_history',
+        '_default_record_history',
+        '_history_from_start',
+        '_max_history',
+        '_legal_moves',
+        '_legal_moves_set',
+        '_obs',
+        '_action_dispatch',
+        '_by_name',
+        '_cards_on_board',
+        '_cards_shown_count',
+        '_playing_count',
+        '_alive_count',
+        '_playing_with_empty_stack',
+        '_max_points',
+    )
+
+    def __init__(self, player_names: List[str], record_history: bool = True, max_history: Optional[int] = None):
+        # Players keep their seat, the round starts at seat _start_offset instead of rotating the table
         self.players: List[Player] = [Player(name=x) for x in player_names]
+        self._start_offset: int = 0
         self.bet_holder: Optional[Player] = None
         self.highest_bet: int = 0
         self.next_player: Player = self.players[0]
-        self.legal_moves: List[Action] = self._get_legal_moves()
-        self.action_record: List[str] = []
-        self.state_record: List[BoardState] = []
+        # Seats of next_player and bet_holder in self.players, turns advance without searching the table
+        self.next_player_idx: int = 0
+        self.bet_holder_idx: Optional[int] = None
+        self._rebuild_indexes()
+        self._recount()
+        self._obs: np.ndarray = np.zeros(OBS_HEADER_SIZE + OBS_PLAYER_SIZE * len(self.players), dtype=np.float32)
+        self._invalidate_legal_moves()
+        # Without history push skips the snapshot, but pop is no longer available
+        self._record_history = record_history
+        self._default_record_history = record_history
+        # False once moves were pushed without being recorded or fell out of a bounded history
+        self._history_from_start = True
+        self._max_history = max_history
+        # max_history bounds the memory used when the search depth is known, unbounded records stay plain lists
+        self.action_record: Union[List[str], Deque[str]] = [] if max_history is None else deque(maxlen=max_history)
+        # Each entry also keeps the legal moves of that position, so pop does not recompute them
+        self.state_record: Union[List[_HistoryEntry], Deque[_HistoryEntry]] = (
+            [] if max_history is None else deque(maxlen=max_history)
+        )
+        # Handlers indexed by Action.kind (KIND_PLAY, KIND_LOSE, KIND_REVEAL, KIND_BET, KIND_PASS)
+        self._action_dispatch: Tuple[Callable[[Player, Any], None], ...] = (
+            self._do_play,
+            self._do_lose,
+            self._do_reveal,
+            self._do_bet,
+            self._do_pass,
+        )
+
+    def _players_in_turn_order(self) -> Iterator[Player]:
+        # Players starting with the first player of the round, read from their seats without copying the table
+        players = self.players
+        nbr_players = len(players)
+        for seat in range(self._start_offset, self._start_offset + nbr_players):
+            yield players[seat % nbr_players]
+
+    def _rebuild_indexes(self):
+        # Must be called whenever self.players is replaced
+        self._by_name: Dict[str, Player] = {p.name: p for p in self.players}
+
+    def _count(self, player: Player):
+        # Add the player's contribution to the board counters
+        self._cards_on_board += player.stack_len
+        self._cards_shown_count += player.revealed_flowers + player.revealed_skulls
+        self._playing_count += int(player.is_playing)
+        self._alive_count += int(player.alive)
+        self._playing_with_empty_stack += int(player.is_playing and player.stack_len == 0)
+        self._max_points = max(self._max_points, player.points)
+
+    def _uncount(self, player: Player):
+        # Points never decrease, so _max_points is left untouched
+        self._cards_on_board -= player.stack_len
+        self._cards_shown_count -= player.revealed_flowers + player.revealed_skulls
+        self._playing_count -= int(player.is_playing)
+        self._alive_count -= int(player.alive)
+        self._playing_with_empty_stack -= int(player.is_playing and player.stack_len == 0)
+
+    def _recount(self):
+        self._cards_on_board = 0
+        self._cards_shown_count = 0
+        self._playing_count = 0
+        self._alive_count = 0
+        self._playing_with_empty_stack = 0
+        self._max_points = 0
+        for player in self.players:
+            self._count(player)
 
     def _has_anyone_won(self) -> bool:
-        return any([player.points > 1 for player in self.players])
+        return self._max_points > 1
 
     def _is_more_than_one_player_alive(self) -> bool:
-        return sum([int(player.alive) for player in self.players]) > 1
+        return self._alive_count > 1
 
     def _is_round_over(self) -> bool:
-        return not any([player.is_playing for player in self.players])
+        return self._playing_count == 0
 
     def _nbr_cards_on_board(self) -> int:
-        return sum([len(player.cards_stack) for player in self.players])
+        return self._cards_on_board
 
     def _cards_shown(self) -> int:
-        return sum([len(player.cards_revealed) for player in self.players])
+        return self._cards_shown_count
 
     def _start_round(self):
         logger.debug('Starting round')
@@ -68,92 +191,153 @@ class Board:
             player.collect_cards()
             if player.alive:
                 player.is_playing = True
-            if player == self.bet_holder:
-                index = self.players.index(player)
-                # Last bet_holder is next first player
-                self.players = self.players[index:] + self.players[:index]
-        self.next_player = self.players[0]
-        logger.debug(f'First player of round is {self.next_player.name}')
+        if self.bet_holder_idx is not None:
+            # Last bet_holder is next first player
+            self._start_offset = self.bet_holder_idx
+        self.next_player_idx = self._start_offset
+        self.next_player = self.players[self._start_offset]
+        logger.debug('First player of round is %s', self.next_player.name)
         self.bet_holder = None
+        self.bet_holder_idx = None
         self.highest_bet = 0
-
-    def _process_action(self, player: Player, action: Action):
-        if isinstance(action, PlayCardAction):
-            logger.debug(f'Player {player.name} played card {action.card.value}')
-            if action.card == Card.FLOWER:
-                player.play_flower()
-            elif action.card == Card.SKULL:
-                player.play_skull()
-            else:
-                raise MoveIsNotLegal()
-
-        elif isinstance(action, BetAction):
-            logger.debug(f'Player {player.name} bet {action.amount}')
-            self.bet_holder = player
-            self.highest_bet = action.amount
-
-        elif isinstance(action, RevealCardAction):
-            for p in self.players:
-                if p.name == action.player_name:
-                    card = next(p.reveal_stack())  # type: ignore
-                    logger.debug(f'Player {player.name} revealed the card of {p.name}' f' and it is a {card.value}')
-                    if card == Card.SKULL:
-                        player.is_playing = False
-                        player.remove_card()
-                        logger.debug(f'Player {player.name} lost a random card')
-                    else:
-                        if self._cards_shown() == self.highest_bet:
-                            player.is_playing = False
-                            logger.debug(f'Player {player.name} earned a point')
-                            player.points += 1
-
-        elif isinstance(action, LoseCardAction):
-            logger.debug(f'Player {player.name} chose to lose {action.card.value}')
-            player.collect_cards()
-            player.cards_hand.remove(action.card)
-            if len(player.cards_hand) == 0:
-                logger.debug(f'Player {player.name} got eliminated')
-                player.alive = False
-            player.is_playing = False
-
-        elif isinstance(action, PassAction):
+        self._recount()
+
+    def _do_play(self, player: Player, action: PlayCardAction):
+        logger.debug('Player %s played card %s', player.name, action.card.value)
+        if player.is_playing and player.stack_len == 0:
+            self._playing_with_empty_stack -= 1
+        if action.card == Card.FLOWER:
+            player.play_flower()
+        elif action.card == Card.SKULL:
+            player.play_skull()
+        else:
+            raise MoveIsNotLegal()
+        self._cards_on_board += 1
+
+    def _do_bet(self, player: Player, action: BetAction):
+        logger.debug('Player %s bet %s', player.name, action.amount)
+        self.bet_holder = player
+        self.bet_holder_idx = self.next_player_idx
+        self.highest_bet = action.amount
+
+    def _do_reveal(self, player: Player, action: RevealCardAction):
+        p = self._by_name[action.player_name]
+        card = next(p.reveal_stack())  # type: ignore
+        self._cards_on_board -= 1
+        self._cards_shown_count += 1
+        if p.is_playing and p.stack_len == 0:
+            self._playing_with_empty_stack += 1
+        logger.debug('Player %s revealed the card of %s and it is a %s', player.name, p.name, card.value)
+        if card == Card.SKULL:
+            self._uncount(player)
             player.is_playing = False
+            player.remove_card()
+            self._count(player)
+            logger.debug('Player %s lost a random card', player.name)
+        else:
+            if self._cards_shown() == self.highest_bet:
+                player.is_playing = False
+                self._playing_count -= 1
+                if player.stack_len == 0:
+                    self._playing_with_empty_stack -= 1
+                logger.debug('Player %s earned a point', player.name)
+                player.points += 1
+                self._max_points = max(self._max_points, player.points)
+
+    def _do_lose(self, player: Player, action: LoseCardAction):
+        logger.debug('Player %s chose to lose %s', player.name, action.card.value)
+        self._uncount(player)
+        player.collect_cards()
+        player.lose_card(action.card)
+        if player.flower_hand + player.skull_hand == 0:
+            logger.debug('Player %s got eliminated', player.name)
+            player.alive = False
+        player.is_playing = False
+        self._count(player)
+
+    def _do_pass(self, player: Player, action: PassAction):
+        if player.is_playing:
+            self._playing_count -= 1
+            if player.stack_len == 0:
+                self._playing_with_empty_stack -= 1
+        player.is_playing = False
 
     def winner(self) -> Optional[Player]:
+        # Common case, answered from the counters alone
+        if self._is_more_than_one_player_alive() and not self._has_anyone_won():
+            return None
         if not self._is_more_than_one_player_alive():
-            winner = [x for x in self.players if x.alive][0]
-            logger.debug(f'We have a winner: {winner}')
-            return winner
-        elif self._has_anyone_won():
-            winner = [x for x in self.players if x.points > 1][0]
-            logger.debug(f'We have a winner: {winner}')
-            return winner
+            winner = next(x for x in self.players if x.alive)
         else:
-            return None
+            winner = next(x for x in self.players if x.points > 1)
+        logger.debug('We have a winner: %s', winner)
+        return winner
 
     def push(self, action: Union[Action, str]):
         if self.winner() is not None:
             raise GameIsOver()
         if isinstance(action, str):
             action = Action.from_notation(action)
-        if action not in self.legal_moves:
+        legal_moves = self.legal_moves
+        if action not in self._legal_moves_set:
             raise MoveIsNotLegal()
-        self.state_record.append(deepcopy(self.get_state(show_hand=[p.name for p in self.players])))
-        self.action_record.append(str(action))
-        self._process_action(self.next_player, action)
+        if self._record_history:
+            if len(self.state_record) == self._max_history:
+                # The oldest position is about to be dropped
+                self._history_from_start = False
+            self.state_record.append((self._snapshot(), list(legal_moves), self._start_offset))
+            self.action_record.append(str(action))
+        elif self._history_from_start or self.state_record:
+            # Older positions can no longer be reached by pop, they are dropped
+            self.state_record.clear()
+            self.action_record.clear()
+            self._history_from_start = False
+        # Straight to the handler, push is the hottest path of a search
+        self._action_dispatch[action.kind](self.next_player, action)
         if self._is_round_over():
             self._start_round()
         else:
-            self.next_player = self.players[(self.players.index(self.next_player) + 1) % len(self.players)]
-        self.legal_moves = self._get_legal_moves()
+            self.next_player_idx = (self.next_player_idx + 1) % len(self.players)
+            self.next_player = self.players[self.next_player_idx]
+        self._invalidate_legal_moves()
 
     def pop(self):
         if len(self.state_record) == 0:
+            if not self._history_from_start:
+                raise HistoryIsNotRecorded(
+                    'Moves before this position were not recorded (see record_history, max_history)'
+                )
             raise GameHasNotStarted()
-        last_state = self.state_record[-1]
-        self.load_state(last_state)
-        self.state_record = self.state_record[:-1]
-        self.action_record = self.action_record[:-1]
+        last_state, legal_moves, start_offset = self.state_record.pop()
+        # The snapshot keeps the seats, players get back to them and the round to its first seat
+        self._restore_state(last_state, start_offset)
+        # Recomputing could reveal the player's own cards a second time
+        self._set_legal_moves(legal_moves)
+        self.action_record.pop()
+
+    def reset(self):
+        # Start a new game with the same players, reusing the board and its players
+        for player in self.players:
+            player.reset()
+        self._start_offset = 0
+        self.bet_holder = None
+        self.bet_holder_idx = None
+        self.highest_bet = 0
+        self.next_player_idx = 0
+        self.next_player = self.players[0]
+        self._recount()
+        self.action_record.clear()
+        self.state_record.clear()
+        self._history_from_start = True
+        self._record_history = self._default_record_history
+        self._invalidate_legal_moves()
+
+    def begin_search(self):
+        # Record history so the moves explored from here can be popped
+        self._record_history = True
+
+    def end_search(self):
+        self._record_history = self._default_record_history
 
     def forward(self, action: Union[Action, str]):
         self.push(action)
@@ -161,16 +345,28 @@ class Board:
             self.forward(self.legal_moves[0])
 
     def load_state(self, state: BoardState):
+        self._restore_state(state)
+        self._invalidate_legal_moves()
+
+    def _restore_state(self, state: BoardState, start_offset: int = 0):
+        # get_state lists players from the first player of the round, so load_state seats that player at 0.
+        # History snapshots are listed by seat and come back with their own start_offset.
         self.players = [Player.from_state(state=player_state) for player_state in state.players]
+        self._start_offset = start_offset
+        self._rebuild_indexes()
 
         self.highest_bet = state.highest_bet
-        if state.bet_holder is None:
-            self.bet_holder = None
-        else:
-            self.bet_holder = self.players[[x.name for x in self.players].index(state.bet_holder)]
-        self.next_player = self.players[[x.name for x in self.players].index(state.next_player)]
-        self.legal_moves = self._get_legal_moves()
-        logger.debug(f'State loaded, next player is {self.next_player.name}')
+        self.bet_holder = None
+        self.bet_holder_idx = None
+        for i, player in enumerate(self.players):
+            if player.name == state.next_player:
+                self.next_player_idx = i
+                self.next_player = player
+            if player.name == state.bet_holder:
+                self.bet_holder_idx = i
+                self.bet_holder = player
+        self._recount()
+        logger.debug('State loaded, next player is %s', self.next_player.name)
 
     def _get_legal_moves_cards_and_bet_stage(self) -> List[Action]:
         player = self.next_player
@@ -178,66 +374,134 @@ class Board:
         # If there is no bet, he can place cards
         if self.bet_holder is None:
             if player.can_play_flower():
-                legal_actions.append(PlayCardAction(Card.FLOWER))
+                legal_actions.append(PLAY_FLOWER)
             if player.can_play_skull():
-                legal_actions.append(PlayCardAction(Card.SKULL))
+                legal_actions.append(PLAY_SKULL)
         # If there is a bet, he can abandon
         else:
-            legal_actions.append(PassAction())
+            legal_actions.append(PASS)
 
         # If everyone has played at least once, he can bet
         # up to the total number of cards
-        if not any([(len(p.cards_stack) == 0) and p.is_playing for p in self.players]):
-            for i in range(self.highest_bet + 1, self._nbr_cards_on_board() + 1):
-                legal_actions.append(BetAction(i))
-        logger.debug(f'Legal moves {legal_actions}')
+        if self._playing_with_empty_stack == 0:
+            legal_actions.extend(bet_actions(self.highest_bet + 1, self._nbr_cards_on_board()))
+        logger.debug('Legal moves %s', legal_actions)
         return legal_actions
 
     def _get_legal_moves_reveal_cards_stage(self) -> List[Action]:
         player = self.next_player
         # Starting with his own cards
         for card in player.reveal_stack():
-            logger.debug(f'Player {player.name} reveald card {card.value} from his stack')
+            logger.debug('Player %s reveald card %s from his stack', player.name, card.value)
             if card == Card.SKULL:
                 # Auto Skulled
                 player.collect_cards()
                 if player.can_play_flower():
-                    return [LoseCardAction(Card.FLOWER), LoseCardAction(Card.SKULL)]
+                    return [LOSE_FLOWER, LOSE_SKULL]
                 else:
-                    return [LoseCardAction(Card.SKULL)]
+                    return [LOSE_SKULL]
 
-            if len(player.cards_revealed) == self.highest_bet:
+            if player.revealed_flowers == self.highest_bet:
                 # Victory by returning only own cards
-                logger.debug(f'Player {player.name} earned a point')
+                logger.debug('Player %s earned a point', player.name)
                 player.points += 1
-                return [PassAction()]
+                return [PASS]
 
         # Player can return cards from every player
         # except himself if they have played more cards then they have shown
         return [
-            RevealCardAction(opponent.name)
-            for opponent in self.players
-            if opponent != player and len(opponent.cards_stack) > 0
+            reveal_card_action(opponent.name)
+            for opponent in self._players_in_turn_order()
+            if opponent is not player and opponent.stack_len > 0
         ]
 
+    @property
+    def legal_moves(self) -> List[Action]:
+        if self._legal_moves is None:
+            self._set_legal_moves(self._get_legal_moves())
+        return self._legal_moves  # type: ignore
+
+    def _set_legal_moves(self, legal_moves: List[Action]):
+        self._legal_moves: Optional[List[Action]] = legal_moves
+        # Actions are hashable, membership checks in push stay O(1)
+        self._legal_moves_set: FrozenSet[Action] = frozenset(legal_moves)
+
+    def _invalidate_legal_moves(self):
+        # Legal moves are computed on first access, a push followed by a pop never pays for them.
+        # The reveal stage flips the player's own cards though, so it still runs right away.
+        player = self.next_player
+        if player is self.bet_holder and player.alive and player.is_playing:
+            self._set_legal_moves(self._get_legal_moves())
+        else:
+            self._legal_moves = None
+
     def _get_legal_moves(self) -> List[Action]:  # type: ignore
         player = self.next_player
         if not player.alive or not player.is_playing:
-            return [PassAction()]
-        if self.bet_holder != player:
+            return [PASS]
+        if self.bet_holder is not player:
             # Player did not place the highest bet
             return self._get_legal_moves_cards_and_bet_stage()
         else:
             # One round has passed and player still has the highest bets
-            # He can show cards
-            return self._get_legal_moves_reveal_cards_stage()
+            # He can show cards, which changes his stack, hand and points
+            self._uncount(player)
+            try:
+                return self._get_legal_moves_reveal_cards_stage()
+            finally:
+                self._count(player)
 
     def get_state(self, show_hand: Union[List[str], str] = 'next_player') -> BoardState:
         if show_hand == 'next_player':
             show_hand = [self.next_player.name]
         return BoardState(
             next_player=self.next_player.name,
-            players=[p.get_state(hidden=(p.name not in show_hand)) for p in self.players],  # type: ignore
+            players=[
+                p.get_state(hidden=(p.name not in show_hand)) for p in self._players_in_turn_order()  # type: ignore
+            ],
+            highest_bet=self.highest_bet,
+            bet_holder=self.bet_holder.name if self.bet_holder is not None else None,
+        )
+
+    def get_obs(self, perspective_idx: Optional[int] = None) -> np.ndarray:
+        # Features of the board seen from a seat (the next player's by default), written in place.
+        # perspective_idx is a seat in self.players, not a position in get_state().players which follows
+        # the turn order of the round. The same array is returned on every call, copy it to keep an observation.
+        nbr_players = len(self.players)
+        if perspective_idx is None:
+            perspective_idx = self.next_player_idx
+        elif not 0 <= perspective_idx < nbr_players:
+            raise IndexError(f'perspective_idx {perspective_idx} is not a seat of a {nbr_players} players board')
+        obs = self._obs
+        if len(obs) != OBS_HEADER_SIZE + OBS_PLAYER_SIZE * nbr_players:
+            # A loaded state can have another number of players
+            obs = self._obs = np.zeros(OBS_HEADER_SIZE + OBS_PLAYER_SIZE * nbr_players, dtype=np.float32)
+        obs[0] = self.highest_bet
+        obs[1] = self._cards_shown_count
+        i = OBS_HEADER_SIZE
+        for seat in range(perspective_idx, perspective_idx + nbr_players):
+            player = self.players[seat % nbr_players]
+            visible = seat == perspective_idx
+            obs[i] = player.flower_hand + player.skull_hand
+            obs[i + 1] = player.skull_hand if visible else 0
+            obs[i + 2] = player.stack_len
+            obs[i + 3] = _SKULLS_IN_STACK[player.stack_skulls] if visible else 0
+            obs[i + 4] = player.revealed_flowers
+            obs[i + 5] = player.revealed_skulls
+            obs[i + 6] = player.points
+            obs[i + 7] = player.alive
+            obs[i + 8] = player.is_playing
+            obs[i + 9] = player is self.next_player
+            obs[i + 10] = player is self.bet_holder
+            i += OBS_PLAYER_SIZE
+        return obs
+
+    def _snapshot(self) -> BoardState:
+        # Player states never share lists with the players, no extra copy is needed.
+        # Unlike get_state, players are listed by seat so pop can put them back in place.
+        return BoardState(
+            next_player=self.next_player.name,
+            players=[p.get_state() for p in self.players],
             highest_bet=self.highest_bet,
             bet_holder=self.bet_holder.name if self.bet_holder is not None else None,
         )
@@ -246,7 +510,6 @@ class Board:
     def from_state(self, state: BoardState):
         new_board = Board(player_names=[])
         new_board.load_state(state)
-        new_board.legal_moves = new_board._get_legal_moves()
         return new_board
 
     def _ipython_display_(self):
@@ -5,3 +5,7 @@ class Card(Enum):
     FLOWER = "F"
     SKULL = "S"
     hidden = "H"
+
+    # Members are singletons compared by identity, hashing them by identity is consistent
+    # and skips Enum.__hash__, which runs in Python on every set and dict lookup
+    __hash__ = object.__hash__
@@ -1,8 +1,10 @@
 import math
 import os
-from PIL import Image, ImageDraw
+from itertools import chain
+from typing import Dict, List, Tuple
+from PIL import Image
 import numpy as np
-from ipycanvas import Canvas
+from ipycanvas import Canvas, hold_canvas
 from .card import Card
 
 
@@ -12,6 +14,9 @@ script_directory = os.path.dirname(os.path.abspath(__file__))
 CARDS_IMAGE_PATH = os.path.join(script_directory, "../images/cards.png")
 POINT_IMAGE_PATH = os.path.join(script_directory, "../images/point.png")
 POINT_IMAGE = np.array(Image.open(POINT_IMAGE_PATH).resize((30, 30)))
+CARD_SIZE = 50
+# Each card of a pile is drawn this many pixels right and down from the previous one
+CARD_SHIFT = 5
 
 
 def calculate_coordinates(center_pos: tuple, start_pos: tuple, angle_at_a: float):
@@ -22,25 +27,18 @@ def calculate_coordinates(center_pos: tuple, start_pos: tuple, angle_at_a: float
     x1 = center_pos[0]
     y1 = center_pos[1]
 
-    x2 = start_pos[0]
-    y2 = start_pos[1]
-    # Calculate the length of AB
-    ab_length = math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-
-    # Normalize AB vector
-    abx_normalized = (x2 - x1) / ab_length
-    aby_normalized = (y2 - y1) / ab_length
+    # AB vector
+    abx = start_pos[0] - x1
+    aby = start_pos[1] - y1
 
     # Convert the angle from degrees to radians
     theta = math.radians(angle_at_a)
+    cos_theta = math.cos(theta)
+    sin_theta = math.sin(theta)
 
-    # Rotate the normalized AB vector
-    x3 = abx_normalized * math.cos(theta) - aby_normalized * math.sin(theta)
-    y3 = abx_normalized * math.sin(theta) + aby_normalized * math.cos(theta)
-
-    # Scale the rotated vector to the length of AB
-    x3 *= ab_length
-    y3 *= ab_length
+    # Rotate the AB vector, a rotation keeps its length so there is no need to normalize it
+    x3 = abx * cos_theta - aby * sin_theta
+    y3 = abx * sin_theta + aby * cos_theta
 
     # Calculate the coordinates of vertex C
     x3 += x1
@@ -49,49 +47,65 @@ def calculate_coordinates(center_pos: tuple, start_pos: tuple, angle_at_a: float
     return x3, y3
 
 
-def keep_image_center(image_matrix):
-    # Truncate card images and set transparent mask
+# Stack, hand and points positions of every seat, keyed by number of players
+_layout_cache: Dict[int, np.ndarray] = {}
+
+
+def _compute_layout(nbr_players: int) -> np.ndarray:
+    offset = 360 / nbr_players
+    center_pos = (CANVAS_SIZE[0] / 2, CANVAS_SIZE[1] / 2)
+    start_pos = (CANVAS_SIZE[0] / 2, CANVAS_SIZE[1] - 50)
+    layout = np.empty((nbr_players, 3, 2))
+    for i in range(nbr_players):
+        angle = offset * (i + 1)
+        layout[i, 0] = calculate_coordinates(center_pos, start_pos, angle)
+        layout[i, 1] = calculate_coordinates(center_pos, start_pos, angle - 20)
+        layout[i, 2] = calculate_coordinates(center_pos, start_pos, angle + 20)
+    return layout
+
 
-    # Add an alpha channel with value 255 for all pixels
-    alpha_channel = np.full(
-        (image_matrix.shape[0], image_matrix.shape[1], 1), 255, dtype=np.uint8
-    )
-    image_matrix = np.concatenate((image_matrix, alpha_channel), axis=2)
+def get_layout(nbr_players: int) -> np.ndarray:
+    # The layout only depends on the number of players, it is computed once per table size
+    layout = _layout_cache.get(nbr_players)
+    if layout is None:
+        layout = _layout_cache[nbr_players] = _compute_layout(nbr_players)
+    return layout
 
-    # Create a blank transparent image with the same shape as the original image
-    transparent_image = Image.new(
-        "RGBA", (image_matrix.shape[1], image_matrix.shape[0]), (0, 0, 0, 0)
-    )
 
-    # Create an ImageDraw object to draw on the transparent image
-    draw = ImageDraw.Draw(transparent_image)
+# Circle masks of the card images, keyed by image shape
+_circle_mask_cache: Dict[Tuple[int, int], np.ndarray] = {}
 
+
+def _compute_circle_mask(height: int, width: int) -> np.ndarray:
     # Get the center coordinates of the image
-    center_x = image_matrix.shape[1] // 2
-    center_y = image_matrix.shape[0] // 2
+    center_x = width // 2
+    center_y = height // 2
 
     # Define the radius of the circle
     radius = 130
 
-    # Draw a solid white circle on the transparent image
-    draw.ellipse(
-        (center_x - radius, center_y - radius, center_x + radius, center_y + radius),
-        fill=(255, 255, 255, 255),
-    )
+    # Mask of the pixels inside the circle, built by broadcasting a column against a row
+    # (the extra half pixel matches the edge of PIL's ellipse)
+    yy, xx = np.ogrid[:height, :width]
+    return (xx - center_x) ** 2 + (yy - center_y) ** 2 <= (radius + 0.5) ** 2
+
 
-    # Convert the transparent image to a NumPy array
-    transparent_array = np.array(transparent_image)
+def get_circle_mask(height: int, width: int) -> np.ndarray:
+    # The three card images have the same size, the mask is only computed once
+    circle_mask = _circle_mask_cache.get((height, width))
+    if circle_mask is None:
+        circle_mask = _circle_mask_cache[(height, width)] = _compute_circle_mask(height, width)
+    return circle_mask
 
-    # Create a mask for the circle by checking if the alpha channel is not zero
-    circle_mask = transparent_array[:, :, 3] != 0
 
-    # Create a copy of the original image matrix
-    modified_image_matrix = np.copy(image_matrix)
+def keep_image_center(image_matrix):
+    # Truncate card images and set transparent mask
+    circle_mask = get_circle_mask(*image_matrix.shape[:2])
 
-    # Make the pixels outside the circle transparent (set alpha channel to zero)
-    modified_image_matrix[~circle_mask] = [0, 0, 0, 0]
+    # Stack the masked colors and the alpha channel, pixels outside the circle are transparent black
+    modified_image_matrix = np.dstack((image_matrix * circle_mask[:, :, np.newaxis], circle_mask * np.uint8(255)))
     modified_image = Image.fromarray(modified_image_matrix)
-    modified_image = modified_image.resize((50, 50))
+    modified_image = modified_image.resize((CARD_SIZE, CARD_SIZE))
     return np.array(modified_image)
 
 
@@ -114,42 +128,51 @@ card_skins = {
 }
 
 
+def composite_cards(images: List[np.ndarray]) -> np.ndarray:
+    # Paint a pile of cards into one RGBA image, so the pile is sent to the canvas in a single call.
+    # Each card is alpha blended over the cards below it, as the canvas does when drawing them one by one.
+    size = CARD_SIZE + CARD_SHIFT * (len(images) - 1)
+    # Colors are kept premultiplied by alpha while blending
+    color = np.zeros((size, size, 3))
+    alpha = np.zeros((size, size, 1))
+    for i, image in enumerate(images):
+        of = CARD_SHIFT * i
+        window = (slice(of, of + CARD_SIZE), slice(of, of + CARD_SIZE))
+        card_alpha = image[:, :, 3:] / 255
+        color[window] = image[:, :, :3] * card_alpha + color[window] * (1 - card_alpha)
+        alpha[window] = card_alpha + alpha[window] * (1 - card_alpha)
+    pile = np.zeros((size, size, 4), dtype=np.uint8)
+    pile[:, :, :3] = np.rint(np.divide(color, alpha, out=np.zeros_like(color), where=alpha > 0))
+    pile[:, :, 3:] = np.rint(alpha * 255)
+    return pile
+
+
 def get_canvas(state: 'BoardState') -> Canvas:  # type: ignore
-    canvas.clear()
-    canvas.stroke_style = "black"
-    canvas.stroke_rect(0, 0, CANVAS_SIZE[0], CANVAS_SIZE[1])
-    canvas.fill_style = "green"
-    canvas.fill_circle(CANVAS_SIZE[0] / 2, CANVAS_SIZE[1] / 2,  min(CANVAS_SIZE) / 2)
-    offset = 360 / len(state.players)
-    angle: float = 0
-    center_pos = (CANVAS_SIZE[0] / 2, CANVAS_SIZE[1] / 2)
-    start_pos = (CANVAS_SIZE[0] / 2, CANVAS_SIZE[1] - 50)
-    for player in state.players:
-        angle += offset
-        stack_posx, stack_posy = calculate_coordinates(center_pos, start_pos, angle)
-        hand_posx, hand_posy = calculate_coordinates(center_pos, start_pos, angle - 20)
-        if player.points:
-            points_posx, points_posy = calculate_coordinates(
-                center_pos, start_pos, angle + 20
-            )
-            canvas.put_image_data(
-                POINT_IMAGE,
-                points_posx,
-                points_posy,
-            )
-        canvas.stroke_style = "red"
-        canvas.stroke_circle(stack_posx, stack_posy, 30)
-        canvas.stroke_style = "white"
-        canvas.stroke_circle(hand_posx, hand_posy, 30)
-        of = -25
-        for card in player.cards_hand:
-            canvas.put_image_data(card_skins[card], hand_posx + of, hand_posy + of)
-            of += 5
-        of = -25
-        for card in player.cards_stack:
-            canvas.put_image_data(card_skins[card], stack_posx + of, stack_posy + of)
-            of += 5
-        for card in player.cards_revealed:
-            canvas.put_image_data(card_skins[card], stack_posx + of, stack_posy + of)
-            of += 5
+    # Batch every drawing command of the frame into one message to the front end
+    with hold_canvas(canvas):
+        canvas.clear()
+        canvas.stroke_style = "black"
+        canvas.stroke_rect(0, 0, CANVAS_SIZE[0], CANVAS_SIZE[1])
+        canvas.fill_style = "green"
+        canvas.fill_circle(CANVAS_SIZE[0] / 2, CANVAS_SIZE[1] / 2,  min(CANVAS_SIZE) / 2)
+        layout = get_layout(len(state.players))
+        for player, positions in zip(state.players, layout):
+            (stack_posx, stack_posy), (hand_posx, hand_posy), (points_posx, points_posy) = positions
+            if player.points:
+                canvas.put_image_data(
+                    POINT_IMAGE,
+                    points_posx,
+                    points_posy,
+                )
+            canvas.stroke_style = "red"
+            canvas.stroke_circle(stack_posx, stack_posy, 30)
+            canvas.stroke_style = "white"
+            canvas.stroke_circle(hand_posx, hand_posy, 30)
+            hand = [card_skins[card] for card in player.cards_hand]
+            if hand:
+                canvas.put_image_data(composite_cards(hand), hand_posx - CARD_SIZE // 2, hand_posy - CARD_SIZE // 2)
+            # Revealed cards are piled on top of the stack
+            stack = [card_skins[card] for card in chain(player.cards_stack, player.cards_revealed)]
+            if stack:
+                canvas.put_image_data(composite_cards(stack), stack_posx - CARD_SIZE // 2, stack_posy - CARD_SIZE // 2)
     return canvas
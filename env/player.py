@@ -1,6 +1,5 @@
 from .card import Card
-from copy import copy
-from typing import List, Iterable
+from typing import List, Iterable, Sequence
 from dataclasses import dataclass
 import random
 
@@ -21,11 +20,17 @@ class CannotLoadHiddenStateException(Exception):
     pass
 
 
+# Hidden hands and stacks for every possible size (a player never holds more than 4 cards),
+# shared by all hidden states instead of being rebuilt on each get_state
+_HIDDEN_CARDS = tuple((Card.hidden,) * n for n in range(5))
+
+
 @dataclass
 class PlayerState:
+    __slots__ = ('name', 'cards_hand', 'cards_stack', 'points', 'alive', 'is_playing', 'cards_revealed')
     name: str
-    cards_hand: List[Card]
-    cards_stack: List[Card]
+    cards_hand: Sequence[Card]
+    cards_stack: Sequence[Card]
     points: int
     alive: bool
     is_playing: bool
@@ -33,74 +38,128 @@ class PlayerState:
 
     @property
     def is_hidden(self):
-        return Card.hidden in self.cards_hand + self.cards_stack
+        return Card.hidden in self.cards_hand or Card.hidden in self.cards_stack
 
 
 class Player:
+    __slots__ = (
+        'name',
+        'flower_hand',
+        'skull_hand',
+        'stack_skulls',
+        'stack_len',
+        'points',
+        'alive',
+        'is_playing',
+        'revealed_flowers',
+        'revealed_skulls',
+    )
+
     def __init__(self, name: str):
         self.name: str = name
-        self.cards_hand: List[Card] = [
-            Card.FLOWER,
-            Card.FLOWER,
-            Card.FLOWER,
-            Card.SKULL,
-        ]
-        self.cards_stack: List[Card] = []
+        self.reset()
+
+    def reset(self):
+        # There are only two kinds of cards, the hand is kept as one counter per kind
+        self.flower_hand: int = 3
+        self.skull_hand: int = 1
+        # Bit i is set when the i-th card of the stack (from the bottom) is a skull
+        self.stack_skulls: int = 0
+        self.stack_len: int = 0
         self.points: int = 0
         self.alive: bool = True
         self.is_playing: bool = True
-        self.cards_revealed: List[Card] = []
+        # A skull ends the reveals, so revealed cards are always flowers followed by at most one skull
+        self.revealed_flowers: int = 0
+        self.revealed_skulls: int = 0
+
+    @property
+    def cards_hand(self) -> List[Card]:
+        return [Card.FLOWER] * self.flower_hand + [Card.SKULL] * self.skull_hand
+
+    @property
+    def cards_stack(self) -> List[Card]:
+        return [Card.SKULL if self.stack_skulls >> i & 1 else Card.FLOWER for i in range(self.stack_len)]
+
+    @property
+    def cards_revealed(self) -> List[Card]:
+        return [Card.FLOWER] * self.revealed_flowers + [Card.SKULL] * self.revealed_skulls
 
     def can_play_skull(self) -> bool:
-        return Card.SKULL in self.cards_hand
+        return self.skull_hand > 0
 
     def can_play_flower(self) -> bool:
-        return Card.FLOWER in self.cards_hand
+        return self.flower_hand > 0
 
     def remove_card(self):
         self.collect_cards()
-        if len(self.cards_hand) > 0:
-            self.cards_hand.pop(random.randrange(len(self.cards_hand)))
+        nbr_cards = self.flower_hand + self.skull_hand
+        if nbr_cards > 0:
+            if random.randrange(nbr_cards) < self.skull_hand:
+                self.skull_hand -= 1
+            else:
+                self.flower_hand -= 1
         else:
             self.alive = False
             raise NoCardsException()
 
+    def lose_card(self, card: Card):
+        if card == Card.SKULL:
+            if not self.can_play_skull():
+                raise NoSkullException()
+            self.skull_hand -= 1
+        elif card == Card.FLOWER:
+            if not self.can_play_flower():
+                raise NoFlowerException()
+            self.flower_hand -= 1
+        else:
+            raise NoCardsException()
+
     def play_flower(self):
         if self.can_play_flower():
-            self.cards_hand.remove(Card.FLOWER)
-            self.cards_stack.append(Card.FLOWER)
+            self.flower_hand -= 1
+            self.stack_len += 1
         else:
             raise NoFlowerException()
 
     def play_skull(self):
         if self.can_play_skull():
-            self.cards_hand.remove(Card.SKULL)
-            self.cards_stack.append(Card.SKULL)
+            self.skull_hand -= 1
+            self.stack_skulls |= 1 << self.stack_len
+            self.stack_len += 1
         else:
             raise NoSkullException()
 
     def reveal_stack(self) -> Iterable[Card]:
-        stack = copy(self.cards_stack)
-        for card in reversed(stack):
-            self.cards_revealed.append(card)
-            self.cards_stack = self.cards_stack[:-1]
-            yield card
+        while self.stack_len > 0:
+            self.stack_len -= 1
+            if self.stack_skulls >> self.stack_len & 1:
+                self.stack_skulls ^= 1 << self.stack_len
+                self.revealed_skulls += 1
+                yield Card.SKULL
+            else:
+                self.revealed_flowers += 1
+                yield Card.FLOWER
 
     def collect_cards(self):
-        self.cards_hand += self.cards_stack + self.cards_revealed
-        self.cards_stack = []
-        self.cards_revealed = []
-        if len(self.cards_hand) == 0:
+        stacked_skulls = bin(self.stack_skulls).count('1')
+        self.skull_hand += stacked_skulls + self.revealed_skulls
+        self.flower_hand += self.stack_len - stacked_skulls + self.revealed_flowers
+        self.stack_skulls = 0
+        self.stack_len = 0
+        self.revealed_flowers = 0
+        self.revealed_skulls = 0
+        if self.flower_hand + self.skull_hand == 0:
             self.alive = False
 
     def get_state(self, hidden: bool = False) -> PlayerState:
         return PlayerState(
             name=self.name,
             points=self.points,
-            cards_hand=[Card.hidden for _ in self.cards_hand]
+            cards_hand=_HIDDEN_CARDS[self.flower_hand + self.skull_hand]
             if hidden
             else self.cards_hand,
-            cards_stack=[Card.hidden for _ in self.cards_stack]
+            cards_stack=_HIDDEN_CARDS[self.stack_len]
             if hidden
             else self.cards_stack,
             cards_revealed=self.cards_revealed,
@@ -113,10 +172,13 @@ class Player:
         if state.is_hidden:
             raise CannotLoadHiddenStateException()
         new_player = Player(name=state.name)
-        new_player.cards_hand = state.cards_hand
-        new_player.cards_stack = state.cards_stack
+        new_player.flower_hand = state.cards_hand.count(Card.FLOWER)
+        new_player.skull_hand = state.cards_hand.count(Card.SKULL)
+        new_player.stack_skulls = sum(1 << i for i, card in enumerate(state.cards_stack) if card == Card.SKULL)
+        new_player.stack_len = len(state.cards_stack)
         new_player.points = state.points
         new_player.alive = state.alive
         new_player.is_playing = state.is_playing
-        new_player.cards_revealed = state.cards_revealed
+        new_player.revealed_flowers = state.cards_revealed.count(Card.FLOWER)
+        new_player.revealed_skulls = state.cards_revealed.count(Card.SKULL)
         return new_player
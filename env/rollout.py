@@ -0,0 +1,249 @@
+import numpy as np
+from numba import njit, prange
+
+# Array version of Board for fast random playouts. Each game is a (n_players, N_FIELDS) array
+# holding the same counters as Player, plus a GAME_SIZE array for the board scalars.
+# Players keep their seat: instead of rotating the table, the bet holder is made first player.
+
+# Player fields
+FLOWER_HAND = 0
+SKULL_HAND = 1
+STACK_SKULLS = 2  # Bit i is set when the i-th card of the stack (from the bottom) is a skull
+STACK_LEN = 3
+REVEALED_FLOWERS = 4
+REVEALED_SKULLS = 5
+POINTS = 6
+ALIVE = 7
+IS_PLAYING = 8
+N_FIELDS = 9
+
+# Board fields
+NEXT_PLAYER = 0
+FIRST_PLAYER = 1
+BET_HOLDER = 2  # -1 when nobody has bet
+HIGHEST_BET = 3
+GAME_SIZE = 4
+
+# Action kinds, the second column of a move holds the bet amount or the revealed player
+PLAY_FLOWER = 0
+PLAY_SKULL = 1
+BET = 2
+REVEAL = 3
+LOSE_FLOWER = 4
+LOSE_SKULL = 5
+PASS = 6
+
+NO_WINNER = -1
+
+
+@njit(cache=True)
+def new_game(n_players):
+    players = np.zeros((n_players, N_FIELDS), dtype=np.int8)
+    players[:, FLOWER_HAND] = 3
+    players[:, SKULL_HAND] = 1
+    players[:, ALIVE] = 1
+    players[:, IS_PLAYING] = 1
+    game = np.zeros(GAME_SIZE, dtype=np.int8)
+    game[BET_HOLDER] = -1
+    return players, game
+
+
+@njit(cache=True)
+def new_moves(n_players):
+    # Two card plays plus one bet per card that can be on the board
+    return np.empty((4 * n_players + 2, 2), dtype=np.int8)
+
+
+@njit(cache=True)
+def _collect_cards(players, p):
+    stacked_skulls = 0
+    for i in range(players[p, STACK_LEN]):
+        stacked_skulls += (players[p, STACK_SKULLS] >> i) & 1
+    players[p, SKULL_HAND] += stacked_skulls + players[p, REVEALED_SKULLS]
+    players[p, FLOWER_HAND] += players[p, STACK_LEN] - stacked_skulls + players[p, REVEALED_FLOWERS]
+    players[p, STACK_SKULLS] = 0
+    players[p, STACK_LEN] = 0
+    players[p, REVEALED_FLOWERS] = 0
+    players[p, REVEALED_SKULLS] = 0
+    if players[p, FLOWER_HAND] + players[p, SKULL_HAND] == 0:
+        players[p, ALIVE] = 0
+
+
+@njit(cache=True)
+def _reveal(players, p):
+    # Flip the top card of the player's stack, returns True for a skull
+    players[p, STACK_LEN] -= 1
+    if (players[p, STACK_SKULLS] >> players[p, STACK_LEN]) & 1:
+        players[p, STACK_SKULLS] ^= 1 << players[p, STACK_LEN]
+        players[p, REVEALED_SKULLS] += 1
+        return True
+    players[p, REVEALED_FLOWERS] += 1
+    return False
+
+
+@njit(cache=True)
+def _remove_card(players, p):
+    _collect_cards(players, p)
+    nbr_cards = players[p, FLOWER_HAND] + players[p, SKULL_HAND]
+    if nbr_cards == 0:
+        players[p, ALIVE] = 0
+    elif np.random.randint(nbr_cards) < players[p, SKULL_HAND]:
+        players[p, SKULL_HAND] -= 1
+    else:
+        players[p, FLOWER_HAND] -= 1
+
+
+@njit(cache=True)
+def _start_round(players, game):
+    for p in range(players.shape[0]):
+        _collect_cards(players, p)
+        if players[p, ALIVE]:
+            players[p, IS_PLAYING] = 1
+    if game[BET_HOLDER] >= 0:
+        # Last bet_holder is next first player
+        game[FIRST_PLAYER] = game[BET_HOLDER]
+    game[NEXT_PLAYER] = game[FIRST_PLAYER]
+    game[BET_HOLDER] = -1
+    game[HIGHEST_BET] = 0
+
+
+@njit(cache=True)
+def legal_moves(players, game, moves) -> int:
+    """Write the legal moves of the next player in moves and return how many there are.
+
+    Like Board, the reveal stage flips the player's own stack while computing them.
+    """
+    p = game[NEXT_PLAYER]
+    if not players[p, ALIVE] or not players[p, IS_PLAYING]:
+        moves[0, 0] = PASS
+        return 1
+    n = 0
+    if game[BET_HOLDER] != p:
+        if game[BET_HOLDER] < 0:
+            if players[p, FLOWER_HAND] > 0:
+                moves[n, 0] = PLAY_FLOWER
+                n += 1
+            if players[p, SKULL_HAND] > 0:
+                moves[n, 0] = PLAY_SKULL
+                n += 1
+        else:
+            moves[n, 0] = PASS
+            n += 1
+        cards_on_board = 0
+        for q in range(players.shape[0]):
+            if players[q, IS_PLAYING] and players[q, STACK_LEN] == 0:
+                return n
+            cards_on_board += players[q, STACK_LEN]
+        for amount in range(game[HIGHEST_BET] + 1, cards_on_board + 1):
+            moves[n, 0] = BET
+            moves[n, 1] = amount
+            n += 1
+        return n
+    # Starting with his own cards
+    while players[p, STACK_LEN] > 0:
+        if _reveal(players, p):
+            _collect_cards(players, p)
+            moves[0, 0] = LOSE_SKULL
+            if players[p, FLOWER_HAND] > 0:
+                moves[0, 0] = LOSE_FLOWER
+                moves[1, 0] = LOSE_SKULL
+                return 2
+            return 1
+        if players[p, REVEALED_FLOWERS] == game[HIGHEST_BET]:
+            players[p, POINTS] += 1
+            moves[0, 0] = PASS
+            return 1
+    for q in range(players.shape[0]):
+        if q != p and players[q, STACK_LEN] > 0:
+            moves[n, 0] = REVEAL
+            moves[n, 1] = q
+            n += 1
+    return n
+
+
+@njit(cache=True)
+def push(players, game, kind, arg):
+    """Play a move returned by legal_moves for the next player."""
+    p = game[NEXT_PLAYER]
+    if kind == PLAY_FLOWER:
+        players[p, FLOWER_HAND] -= 1
+        players[p, STACK_LEN] += 1
+    elif kind == PLAY_SKULL:
+        players[p, SKULL_HAND] -= 1
+        players[p, STACK_SKULLS] |= 1 << players[p, STACK_LEN]
+        players[p, STACK_LEN] += 1
+    elif kind == BET:
+        game[BET_HOLDER] = p
+        game[HIGHEST_BET] = arg
+    elif kind == REVEAL:
+        if _reveal(players, arg):
+            players[p, IS_PLAYING] = 0
+            _remove_card(players, p)
+        else:
+            cards_shown = 0
+            for q in range(players.shape[0]):
+                cards_shown += players[q, REVEALED_FLOWERS] + players[q, REVEALED_SKULLS]
+            if cards_shown == game[HIGHEST_BET]:
+                players[p, IS_PLAYING] = 0
+                players[p, POINTS] += 1
+    elif kind == LOSE_FLOWER or kind == LOSE_SKULL:
+        _collect_cards(players, p)
+        if kind == LOSE_FLOWER:
+            players[p, FLOWER_HAND] -= 1
+        else:
+            players[p, SKULL_HAND] -= 1
+        if players[p, FLOWER_HAND] + players[p, SKULL_HAND] == 0:
+            players[p, ALIVE] = 0
+        players[p, IS_PLAYING] = 0
+    else:
+        players[p, IS_PLAYING] = 0
+
+    for q in range(players.shape[0]):
+        if players[q, IS_PLAYING]:
+            game[NEXT_PLAYER] = (p + 1) % players.shape[0]
+            return
+    _start_round(players, game)
+
+
+@njit(cache=True)
+def winner(players) -> int:
+    """Seat of the winner, or NO_WINNER while the game is going on."""
+    alive = 0
+    last_alive = NO_WINNER
+    for p in range(players.shape[0]):
+        if players[p, ALIVE]:
+            alive += 1
+            last_alive = p
+    if alive <= 1:
+        return last_alive
+    for p in range(players.shape[0]):
+        if players[p, POINTS] > 1:
+            return p
+    return NO_WINNER
+
+
+@njit(cache=True)
+def rollout(players, game, moves) -> int:
+    """Play uniformly random legal moves until the end of the game and return the winner's seat."""
+    while True:
+        # Legal moves first, revealing his own cards can give the player his second point
+        n = legal_moves(players, game, moves)
+        result = winner(players)
+        if result != NO_WINNER:
+            return result
+        i = np.random.randint(n)
+        push(players, game, moves[i, 0], moves[i, 1])
+
+
+@njit(cache=True, parallel=True)
+def batch_rollout(n_games, n_players, policy_seeds):
+    """Play n_games random games from the start in parallel and return each winner's seat.
+
+    Game i is seeded with policy_seeds[i], so results do not depend on the thread it runs on.
+    """
+    winners = np.empty(n_games, dtype=np.int8)
+    for i in prange(n_games):
+        np.random.seed(policy_seeds[i])
+        players, game = new_game(n_players)
+        winners[i] = rollout(players, game, new_moves(n_players))
+    return winners
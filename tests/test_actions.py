@@ -0,0 +1,65 @@
+import copy
+import pickle
+import random
+
+import pytest
+
+from env.actions import (
+    LOSE_FLOWER,
+    PASS,
+    PLAY_FLOWER,
+    PLAY_SKULL,
+    Action,
+    NotationDoesNotExistException,
+    bet_action,
+    reveal_card_action,
+)
+from env.board import Board
+
+
+@pytest.mark.parametrize(
+    'action', [PASS, PLAY_SKULL, PLAY_FLOWER, LOSE_FLOWER, bet_action(3), reveal_card_action('p1')], ids=str
+)
+def test_action_copy_and_pickle_round_trip(action):
+    assert copy.copy(action) == action
+    assert copy.deepcopy(action) == action
+    assert pickle.loads(pickle.dumps(action)) == action
+
+
+def _played_board(seed: int = 0, nbr_moves: int = 20) -> Board:
+    rng = random.Random(seed)
+    board = Board(['p0', 'p1', 'p2', 'p3'])
+    for _ in range(nbr_moves):
+        board.push(rng.choice(board.legal_moves))
+    # Make sure the legal moves are computed and stored on the board
+    assert board.legal_moves
+    return board
+
+
+@pytest.mark.parametrize('clone', [copy.deepcopy, lambda board: pickle.loads(pickle.dumps(board))])
+def test_board_with_legal_moves_round_trip(clone):
+    board = _played_board()
+    record = list(board.action_record)
+    moves = [str(move) for move in board.legal_moves]
+
+    cloned = clone(board)
+    assert [str(move) for move in cloned.legal_moves] == moves
+    assert list(cloned.action_record) == record
+
+    # The clone is independent of the original board
+    cloned.push(cloned.legal_moves[0])
+    assert list(board.action_record) == record
+    assert [str(move) for move in board.legal_moves] == moves
+    cloned.pop()
+    assert [str(move) for move in cloned.legal_moves] == moves
+
+
+@pytest.mark.parametrize('notation', ['S', 'F', 'P', 'B2', 'Rp1', 'LS', 'LF'])
+def test_notation_round_trip(notation):
+    assert str(Action.from_notation(notation)) == notation
+
+
+@pytest.mark.parametrize('notation', ['', 'X', 'Sx', 'FLOWER', 'SS'])
+def test_unknown_notation_is_rejected(notation):
+    with pytest.raises(NotationDoesNotExistException):
+        Action.from_notation(notation)
@@ -0,0 +1,120 @@
+import random
+from collections import deque
+
+import pytest
+
+from env.board import OBS_HEADER_SIZE, OBS_PLAYER_SIZE, Board, GameHasNotStarted, HistoryIsNotRecorded
+from env.card import Card
+
+
+def _play(board: Board, nbr_moves: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(nbr_moves):
+        board.push(rng.choice(board.legal_moves))
+
+
+def test_unbounded_history_is_a_list():
+    board = Board(['p0', 'p1', 'p2'])
+    _play(board, 10)
+    assert isinstance(board.action_record, list)
+    assert isinstance(board.state_record, list)
+    assert len(board.action_record[-3:]) == 3
+
+
+def test_bounded_history_keeps_the_last_moves():
+    board = Board(['p0', 'p1', 'p2'], max_history=4)
+    _play(board, 10)
+    assert isinstance(board.action_record, deque)
+    assert len(board.action_record) == len(board.state_record) == 4
+
+
+def test_pop_on_a_new_board():
+    with pytest.raises(GameHasNotStarted):
+        Board(['p0', 'p1']).pop()
+
+
+def test_pop_without_history():
+    board = Board(['p0', 'p1', 'p2'], record_history=False)
+    _play(board, 5)
+    with pytest.raises(HistoryIsNotRecorded):
+        board.pop()
+
+    # A search records its own moves, which can be popped
+    board.begin_search()
+    _play(board, 3, seed=1)
+    for _ in range(3):
+        board.pop()
+    board.end_search()
+    with pytest.raises(HistoryIsNotRecorded):
+        board.pop()
+
+
+def test_get_obs_hides_the_other_players_skulls():
+    board = Board(['p0', 'p1', 'p2'])
+    _play(board, 6)
+    seat = board.next_player_idx
+    obs = board.get_obs(seat).copy()
+    assert obs.shape == (OBS_HEADER_SIZE + 3 * OBS_PLAYER_SIZE,)
+    for k in range(3):
+        player = board.players[(seat + k) % 3]
+        block = obs[OBS_HEADER_SIZE + k * OBS_PLAYER_SIZE : OBS_HEADER_SIZE + (k + 1) * OBS_PLAYER_SIZE]
+        assert block[0] == player.flower_hand + player.skull_hand
+        assert block[2] == player.stack_len
+        assert block[1] == (player.skull_hand if k == 0 else 0)
+        assert block[3] == (player.cards_stack.count(Card.SKULL) if k == 0 else 0)
+    assert (board.get_obs() == obs).all()
+
+
+@pytest.mark.parametrize('perspective_idx', [-1, 3, 7])
+def test_get_obs_rejects_unknown_seats(perspective_idx):
+    with pytest.raises(IndexError):
+        Board(['p0', 'p1', 'p2']).get_obs(perspective_idx)
+
+
+def test_push_and_pop_keep_the_seats():
+    board = Board(['p0', 'p1', 'p2'])
+    rng = random.Random(0)
+    # Play until a round starts at another seat than the first one
+    while board._start_offset == 0:
+        board.push(rng.choice(board.legal_moves))
+    seats = [p.name for p in board.players]
+    seat = board.next_player_idx
+    moves = [str(move) for move in board.legal_moves]
+    obs = [board.get_obs(i).copy() for i in range(3)]
+
+    for move in list(board.legal_moves):
+        board.push(move)
+        board.pop()
+        assert [p.name for p in board.players] == seats
+        assert board.next_player_idx == seat
+        assert [str(move) for move in board.legal_moves] == moves
+        for i in range(3):
+            assert (board.get_obs(i) == obs[i]).all()
+
+
+def test_pop_stops_at_moves_pushed_outside_a_search():
+    board = Board(['p0', 'p1', 'p2'], record_history=False)
+    board.begin_search()
+    _play(board, 1)
+    board.end_search()
+    _play(board, 2, seed=1)
+    assert not board.action_record
+    with pytest.raises(HistoryIsNotRecorded):
+        board.pop()
+
+
+def test_pop_past_a_bounded_history():
+    board = Board(['p0', 'p1', 'p2'], max_history=3)
+    _play(board, 5)
+    for _ in range(3):
+        board.pop()
+    with pytest.raises(HistoryIsNotRecorded):
+        board.pop()
+
+    # Within the bound the history still reaches the start of the game
+    board = Board(['p0', 'p1', 'p2'], max_history=3)
+    _play(board, 3)
+    for _ in range(3):
+        board.pop()
+    with pytest.raises(GameHasNotStarted):
+        board.pop()
@@ -0,0 +1,113 @@
+import os
+import random
+import subprocess
+import sys
+import types
+
+import numpy as np
+import pytest
+
+numba = pytest.importorskip('numba')
+
+from env import player as player_module  # noqa: E402
+from env import rollout  # noqa: E402
+from env.board import Board  # noqa: E402
+
+# Comparing the kernel with Board move by move runs it as plain Python, in a separate interpreter
+# so NUMBA_DISABLE_JIT does not leak into the rest of the suite
+interpreted = pytest.mark.skipif(not numba.config.DISABLE_JIT, reason='runs with NUMBA_DISABLE_JIT=1')
+compiled = pytest.mark.skipif(numba.config.DISABLE_JIT, reason='needs the Numba JIT')
+
+_NOTATIONS = {
+    rollout.PLAY_FLOWER: 'F',
+    rollout.PLAY_SKULL: 'S',
+    rollout.LOSE_FLOWER: 'LF',
+    rollout.LOSE_SKULL: 'LS',
+    rollout.PASS: 'P',
+}
+
+
+def _notation(kind: int, arg: int) -> str:
+    if kind == rollout.BET:
+        return f'B{arg}'
+    if kind == rollout.REVEAL:
+        return f'Rp{arg}'
+    return _NOTATIONS[kind]
+
+
+def _board_row(player) -> tuple:
+    return (
+        player.flower_hand,
+        player.skull_hand,
+        player.stack_skulls,
+        player.stack_len,
+        player.revealed_flowers,
+        player.revealed_skulls,
+        player.points,
+        int(player.alive),
+        int(player.is_playing),
+    )
+
+
+@interpreted
+@pytest.mark.parametrize('seed', range(100))
+def test_kernel_plays_like_board(seed, monkeypatch):
+    # Both sides lose the same random card: Board draws it, the kernel replays the draw
+    card_rng = random.Random(seed)
+    draws = []
+
+    def randrange(nbr_cards):
+        draws.append(card_rng.randrange(nbr_cards))
+        return draws[-1]
+
+    monkeypatch.setattr(player_module, 'random', types.SimpleNamespace(randrange=randrange))
+    monkeypatch.setattr(rollout.np.random, 'randint', lambda nbr_cards: draws.pop())
+
+    rng = random.Random(seed)
+    nbr_players = 2 + seed % 5
+    board = Board([f'p{i}' for i in range(nbr_players)], record_history=False)
+    players, game = rollout.new_game(nbr_players)
+    moves = rollout.new_moves(nbr_players)
+    while True:
+        nbr_moves = rollout.legal_moves(players, game, moves)
+        kernel_moves = [_notation(moves[i, 0], moves[i, 1]) for i in range(nbr_moves)]
+        assert sorted(kernel_moves) == sorted(str(move) for move in board.legal_moves)
+        for seat, player in enumerate(board.players):
+            assert tuple(int(x) for x in players[seat]) == _board_row(player)
+        assert game[rollout.NEXT_PLAYER] == board.next_player_idx
+
+        winner = board.winner()
+        kernel_winner = rollout.winner(players)
+        assert kernel_winner == (rollout.NO_WINNER if winner is None else board.players.index(winner))
+        if winner is not None:
+            break
+
+        move = rng.choice(kernel_moves)
+        board.push(move)
+        i = kernel_moves.index(move)
+        rollout.push(players, game, moves[i, 0], moves[i, 1])
+    assert not draws
+
+
+@compiled
+def test_kernel_plays_like_board_interpreted():
+    result = subprocess.run(
+        [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', f'{__file__}::test_kernel_plays_like_board'],
+        env=dict(os.environ, NUMBA_DISABLE_JIT='1'),
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '100 passed' in result.stdout
+
+
+@compiled
+@pytest.mark.parametrize('nbr_players', [2, 4, 6])
+def test_batch_rollout_compiled(nbr_players):
+    seeds = np.arange(64, dtype=np.int64)
+    winners = rollout.batch_rollout(len(seeds), nbr_players, seeds)
+    assert winners.shape == (len(seeds),)
+    assert ((winners >= 0) & (winners < nbr_players)).all()
+    # Each game is seeded on its own, the result does not depend on the threads
+    assert (rollout.batch_rollout(len(seeds), nbr_players, seeds) == winners).all()